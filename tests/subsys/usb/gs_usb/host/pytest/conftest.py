@@ -6,54 +6,64 @@
 Configuration of gs_usb test suite.
 """
 
+import errno
 import re
 import logging
 import time
 import pytest
+import usb.core
 
 from twister_harness import DeviceAdapter, Shell
-from gs_usb import GsUSB
+from gs_usb import GsUSB, find_device
 
 logger = logging.getLogger(__name__)
 
+_VID_RE = re.compile(r'USB VID:\s+(\S+)')
+_PID_RE = re.compile(r'USB PID:\s+(\S+)')
+
 def pytest_addoption(parser) -> None:
     """Add local parser options to pytest."""
     parser.addoption('--usb-delay', type=int, default=5,
-                     help='Delay to wait for USB enumeration after flashing (default: 5 seconds)')
+                     help='Maximum time to wait for USB enumeration after flashing '
+                     '(default: 5 seconds)')
     parser.addoption('--usb-sn', type=str, default=None,
                      help='USB serial number of the DUT (default: None)')
 
-@pytest.fixture(name='usb_vid', scope='module')
-def fixture_usb_vid(shell: Shell) -> int:
-    """Return the USB VID used by the DUT."""
-    regex = re.compile(r'USB VID:\s+(\S+)')
-    lines = shell.get_filtered_output(shell.exec_command('gs_usb vid'))
+@pytest.fixture(name='usb_ids', scope='session')
+def fixture_usb_ids(shell: Shell) -> tuple[int, int]:
+    """Return the USB VID and PID used by the DUT."""
+    lines = shell.get_filtered_output(shell.exec_command('gs_usb ids'))
+    vid = None
+    pid = None
 
     for line in lines:
-        m = regex.match(line)
+        m = _VID_RE.match(line)
         if m:
             vid = int(m.groups()[0], 16)
-            return vid
+            continue
 
-    pytest.fail('USB VID not found')
-    return 0x0000
-
-@pytest.fixture(name='usb_pid', scope='module')
-def fixture_usb_pid(shell: Shell) -> int:
-    """Return the USB PID used by the DUT."""
-    regex = re.compile(r'USB PID:\s+(\S+)')
-    lines = shell.get_filtered_output(shell.exec_command('gs_usb pid'))
-
-    for line in lines:
-        m = regex.match(line)
+        m = _PID_RE.match(line)
         if m:
             pid = int(m.groups()[0], 16)
-            return pid
 
-    pytest.fail('USB PID not found')
-    return 0x0000
+    if vid is None:
+        pytest.fail('USB VID not found')
+    if pid is None:
+        pytest.fail('USB PID not found')
+
+    return vid, pid
 
-@pytest.fixture(name='usb_sn', scope='module')
+@pytest.fixture(name='usb_vid', scope='session')
+def fixture_usb_vid(usb_ids: tuple[int, int]) -> int:
+    """Return the USB VID used by the DUT."""
+    return usb_ids[0]
+
+@pytest.fixture(name='usb_pid', scope='session')
+def fixture_usb_pid(usb_ids: tuple[int, int]) -> int:
+    """Return the USB PID used by the DUT."""
+    return usb_ids[1]
+
+@pytest.fixture(name='usb_sn', scope='session')
 def fixture_usb_sn(request, dut: DeviceAdapter) -> str:
     """Return the USB serial number used by the DUT."""
 
@@ -70,12 +80,67 @@ def fixture_usb_sn(request, dut: DeviceAdapter) -> str:
 
     return sn
 
-@pytest.fixture(name='dev', scope='module')
-def fixture_gs_usb(request, usb_vid: int, usb_pid: int, usb_sn: str) -> GsUSB:
-    """Return gs_usb instance for testing"""
+@pytest.fixture(name='usb_deadline', scope='session')
+def fixture_usb_deadline(request) -> float:
+    """Return the deadline for the DUT being ready for gs_usb requests."""
 
     delay = request.config.getoption('--usb-delay')
-    logger.info('Waiting %d seconds for USB enumeration...', delay)
-    time.sleep(delay)
+    logger.info('Waiting up to %d seconds for USB enumeration...', delay)
+
+    return time.monotonic() + delay
+
+@pytest.fixture(name='usb_device', scope='session')
+def fixture_usb_device(usb_vid: int, usb_pid: int, usb_sn: str,
+                       usb_deadline: float) -> usb.core.Device:
+    """Return the USB device of the DUT once enumerated"""
+
+    start = time.monotonic()
+    device = None
+    while time.monotonic() < usb_deadline:
+        device = find_device(usb_vid, usb_pid, usb_sn)
+        if device is not None:
+            break
+        time.sleep(0.05)
+
+    if device is None:
+        pytest.fail(f'USB device {usb_vid:04x}:{usb_pid:04x} S/N {usb_sn} not found')
+
+    logger.info('USB device enumerated after %.2f seconds', time.monotonic() - start)
+
+    return device
+
+@pytest.fixture(name='dev', scope='session')
+def fixture_gs_usb(usb_vid: int, usb_pid: int, usb_sn: str, usb_device: usb.core.Device,
+                   usb_deadline: float) -> GsUSB:
+    """Return gs_usb instance for testing"""
+
+    start = time.monotonic()
+    device = usb_device
+    error = None
+    backoff = 0.01
+
+    # Use the initial HOST_FORMAT request as probe for the DUT being ready
+    while True:
+        if device is not None:
+            try:
+                dev = GsUSB(usb_vid, usb_pid, usb_sn, device=device)
+                break
+            except usb.core.USBError as e:
+                logger.debug('gs_usb device not ready: %s', e)
+                error = e
+                if e.errno == errno.ENODEV:
+                    # Device dropped off the bus, look it up again once it re-enumerates
+                    device = None
+
+        if time.monotonic() + backoff > usb_deadline:
+            pytest.fail(f'USB device {usb_vid:04x}:{usb_pid:04x} S/N {usb_sn} not ready: {error}')
+
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 1.0)
+
+        if device is None:
+            device = find_device(usb_vid, usb_pid, usb_sn)
+
+    logger.info('gs_usb device ready after %.2f seconds', time.monotonic() - start)
 
-    return GsUSB(usb_vid, usb_pid, usb_sn)
+    return dev
@@ -9,14 +9,32 @@ Utility class implementing the gs_usb protocol.
 import logging
 import struct
 
-from dataclasses import dataclass, astuple
+from dataclasses import dataclass
 from enum import IntEnum, IntFlag
+from typing import NamedTuple
 
 import usb.core
 import usb.util
 
 logger = logging.getLogger(__name__)
 
+# Vendor specific, interface recipient control request types
+_RTYPE_OUT = usb.util.build_request_type(usb.util.CTRL_OUT,
+                                         usb.util.CTRL_TYPE_VENDOR,
+                                         usb.util.CTRL_RECIPIENT_INTERFACE)
+_RTYPE_IN = usb.util.build_request_type(usb.util.CTRL_IN,
+                                        usb.util.CTRL_TYPE_VENDOR,
+                                        usb.util.CTRL_RECIPIENT_INTERFACE)
+
+# Little endian wire formats
+_ST_U32 = struct.Struct('<I')
+_ST_2U32 = struct.Struct('<2I')
+_ST_3U32 = struct.Struct('<3I')
+_ST_5U32 = struct.Struct('<5I')
+_ST_10U32 = struct.Struct('<10I')
+_ST_18U32 = struct.Struct('<18I')
+_ST_CFG = struct.Struct('<xxxBII')
+
 class GsUSBDeviceNotFound(Exception):
     """
     Geschwister Schneider USB/CAN device not found.
@@ -139,8 +157,7 @@ class GsUSBCANChannelState(IntEnum):
     # CAN controller is sleeping (unused)
     SLEEPING = 5
 
-@dataclass
-class GsUSBDeviceBTConst: # pylint: disable=too-many-instance-attributes
+class GsUSBDeviceBTConst(NamedTuple):
     """
     Geschwister Schneider USB/CAN protocol CAN classic timing limits.
     """
@@ -165,8 +182,7 @@ class GsUSBDeviceBTConst: # pylint: disable=too-many-instance-attributes
     # Bitrate prescaler increment.
     brp_inc: int
 
-@dataclass
-class GsUSBDeviceBTConstExt: # pylint: disable=too-many-instance-attributes
+class GsUSBDeviceBTConstExt(NamedTuple):
     """
     Geschwister Schneider USB/CAN protocol CAN classic extended timing limits.
     """
@@ -207,7 +223,7 @@ class GsUSBDeviceBTConstExt: # pylint: disable=too-many-instance-attributes
     # Data phase bitrate prescaler increment.
     dbrp_inc: int
 
-@dataclass
+@dataclass(slots=True)
 class GsUSBDeviceBittiming:
     """
     Geschwister Schneider USB/CAN protocol device bittiming.
@@ -223,8 +239,7 @@ class GsUSBDeviceBittiming:
     # Bitrate prescaler */
     brp: int
 
-@dataclass
-class GsUSBDeviceConfig:
+class GsUSBDeviceConfig(NamedTuple):
     """
     Geschwister Schneider USB/CAN protocol device configuration.
     """
@@ -235,7 +250,7 @@ class GsUSBDeviceConfig:
     # Device hardware version
     hw_version: int
 
-@dataclass
+@dataclass(slots=True)
 class GsUSBDeviceMode:
     """
     Geschwister Schneider USB/CAN protocol CAN device mode.
@@ -245,8 +260,7 @@ class GsUSBDeviceMode:
     # CAN channel flags.
     flags: GsUSBCANChannelFlag
 
-@dataclass
-class GsUSBDeviceState:
+class GsUSBDeviceState(NamedTuple):
     """
     Geschwister Schneider USB/CAN protocol CAN device state.
     """
@@ -257,158 +271,115 @@ class GsUSBDeviceState:
     # CAN channel TX bus error count.
     txerr: int
 
+def find_device(usb_vid: int, usb_pid: int, usb_sn: str) -> usb.core.Device | None:
+    """Find a USB device by VID, PID, and optionally serial number."""
+    def match_sn(d: usb.core.Device) -> bool:
+        if usb_sn is None:
+            return True
+
+        try:
+            return d.serial_number == usb_sn
+        except usb.core.USBError:
+            # Device still enumerating
+            return False
+
+    return usb.core.find(idVendor=usb_vid, idProduct=usb_pid, custom_match=match_sn)
+
 class GsUSB():
     """
     Utility class implementing the gs_usb protocol.
     """
 
-    def __init__(self, usb_vid: int, usb_pid: int, usb_sn: str) -> None:
-        device = None
-
-        if usb_sn is None:
-            device = usb.core.find(idVendor=usb_vid, idProduct=usb_pid)
-        else:
-            devices = usb.core.find(find_all=True, idVendor=usb_vid, idProduct=usb_pid)
-            for d in devices:
-                if d.serial_number == usb_sn:
-                    device = d
-                    break
+    def __init__(self, usb_vid: int, usb_pid: int, usb_sn: str,
+                 device: usb.core.Device | None = None) -> None:
+        if device is None:
+            device = find_device(usb_vid, usb_pid, usb_sn)
 
         if device is None:
             logger.error('USB device %04x:%04x S/N %s not found', usb_vid, usb_pid, usb_sn)
             raise GsUSBDeviceNotFound
 
-        device.set_configuration()
+        try:
+            config = device.get_active_configuration()
+        except usb.core.USBError:
+            config = None
+
+        # Avoid resetting the device endpoints if already configured
+        if config is None:
+            device.set_configuration()
+
         self.device = device
 
-        rtype = usb.util.build_request_type(usb.util.CTRL_OUT,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
         # This class assumes little endian transfer format, let the device know
-        data = struct.pack('<I', 0x0000beef)
-        length = self.device.ctrl_transfer(bmRequestType = rtype,
-                                           bRequest = GsUSBbRequest.HOST_FORMAT,
-                                           data_or_wLength = data)
+        self._ctrl_out(GsUSBbRequest.HOST_FORMAT, 0, _ST_U32.pack(0x0000beef))
+
+    def _ctrl_out(self, req: GsUSBbRequest, value: int, data: bytes) -> None:
+        """Send a vendor specific host-to-device control request."""
+        length = self.device.ctrl_transfer(bmRequestType = _RTYPE_OUT, bRequest = req,
+                                           wValue = value, data_or_wLength = data)
         assert length == len(data)
 
+    def _ctrl_in(self, req: GsUSBbRequest, value: int, size: int) -> bytes:
+        """Send a vendor specific device-to-host control request."""
+        return self.device.ctrl_transfer(bmRequestType = _RTYPE_IN, bRequest = req,
+                                         wValue = value, data_or_wLength = size)
+
     def bittiming(self, ch: int, bittiming: GsUSBDeviceBittiming) -> None:
         """Send a bittiming request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_OUT,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = struct.pack('<5I', *astuple(bittiming))
-        length = self.device.ctrl_transfer(bmRequestType = rtype,
-                                           bRequest = GsUSBbRequest.BITTIMING,
-                                           wValue = ch, data_or_wLength = data)
-        assert length == len(data)
+        data = _ST_5U32.pack(bittiming.prop_seg, bittiming.phase_seg1, bittiming.phase_seg2,
+                             bittiming.sjw, bittiming.brp)
+        self._ctrl_out(GsUSBbRequest.BITTIMING, ch, data)
 
     def mode(self, ch: int, mode: GsUSBDeviceMode) -> None:
         """Send a mode request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_OUT,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = struct.pack('<2I', *astuple(mode))
-        length = self.device.ctrl_transfer(bmRequestType = rtype,
-                                           bRequest = GsUSBbRequest.MODE,
-                                           wValue = ch, data_or_wLength = data)
-        assert length == len(data)
+        self._ctrl_out(GsUSBbRequest.MODE, ch, _ST_2U32.pack(mode.mode, mode.flags))
 
     def bt_const(self, ch: int) -> GsUSBDeviceBTConst:
         """Send a bt_const request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_IN,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = self.device.ctrl_transfer(bmRequestType = rtype,
-                                         bRequest = GsUSBbRequest.BT_CONST,
-                                         wValue = ch, data_or_wLength = struct.calcsize('<10I'))
+        data = self._ctrl_in(GsUSBbRequest.BT_CONST, ch, _ST_10U32.size)
 
-        return GsUSBDeviceBTConst(*struct.unpack('<10I', data))
+        return GsUSBDeviceBTConst._make(_ST_10U32.unpack(data))
 
     def device_config(self) -> GsUSBDeviceConfig:
         """Send a device_config request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_IN,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = self.device.ctrl_transfer(bmRequestType = rtype,
-                                         bRequest = GsUSBbRequest.DEVICE_CONFIG,
-                                         data_or_wLength = struct.calcsize('<xxxBII'))
+        data = self._ctrl_in(GsUSBbRequest.DEVICE_CONFIG, 0, _ST_CFG.size)
 
-        return GsUSBDeviceConfig(*struct.unpack('<xxxBII', data))
+        return GsUSBDeviceConfig._make(_ST_CFG.unpack(data))
 
     def timestamp(self) -> int:
         """Send a timestamp request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_IN,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = self.device.ctrl_transfer(bmRequestType = rtype,
-                                         bRequest = GsUSBbRequest.TIMESTAMP,
-                                         data_or_wLength = struct.calcsize('<I'))
+        data = self._ctrl_in(GsUSBbRequest.TIMESTAMP, 0, _ST_U32.size)
 
-        return struct.unpack('<I', data)[0]
+        return _ST_U32.unpack(data)[0]
 
     def identify(self, ch: int, on: bool) -> None:
         """Send an identify on/off request for the given CAN channel."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_OUT,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = struct.pack('<I', on)
-        length = self.device.ctrl_transfer(bmRequestType = rtype,
-                                           bRequest = GsUSBbRequest.IDENTIFY,
-                                           wValue = ch, data_or_wLength = data)
-        assert length == len(data)
+        self._ctrl_out(GsUSBbRequest.IDENTIFY, ch, _ST_U32.pack(on))
 
     def data_bittiming(self, ch: int, bittiming: GsUSBDeviceBittiming) -> None:
         """Send a data_bittiming request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_OUT,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = struct.pack('<5I', *astuple(bittiming))
-        length = self.device.ctrl_transfer(bmRequestType = rtype,
-                                           bRequest = GsUSBbRequest.DATA_BITTIMING,
-                                           wValue = ch, data_or_wLength = data)
-        assert length == len(data)
+        data = _ST_5U32.pack(bittiming.prop_seg, bittiming.phase_seg1, bittiming.phase_seg2,
+                             bittiming.sjw, bittiming.brp)
+        self._ctrl_out(GsUSBbRequest.DATA_BITTIMING, ch, data)
 
     def bt_const_ext(self, ch: int) -> GsUSBDeviceBTConstExt:
         """Send a bt_const_ext request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_IN,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = self.device.ctrl_transfer(bmRequestType = rtype,
-                                         bRequest = GsUSBbRequest.BT_CONST_EXT,
-                                         wValue = ch, data_or_wLength = struct.calcsize('<18I'))
+        data = self._ctrl_in(GsUSBbRequest.BT_CONST_EXT, ch, _ST_18U32.size)
 
-        return GsUSBDeviceBTConstExt(*struct.unpack('<18I', data))
+        return GsUSBDeviceBTConstExt._make(_ST_18U32.unpack(data))
 
     def set_termination(self, ch: int, terminate: bool) -> None:
         """Send a CAN bus termination on/off request for the given CAN channel."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_OUT,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = struct.pack('<I', terminate)
-
-        length = self.device.ctrl_transfer(bmRequestType = rtype,
-                                           bRequest = GsUSBbRequest.SET_TERMINATION,
-                                           wValue = ch, data_or_wLength = data)
-        assert length == len(data)
+        self._ctrl_out(GsUSBbRequest.SET_TERMINATION, ch, _ST_U32.pack(terminate))
 
     def get_termination(self, ch: int) -> bool:
         """Send a CAN bus termination get request for the given CAN channel."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_IN,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = self.device.ctrl_transfer(bmRequestType = rtype,
-                                         bRequest = GsUSBbRequest.GET_TERMINATION,
-                                         wValue = ch, data_or_wLength = struct.calcsize('<I'))
+        data = self._ctrl_in(GsUSBbRequest.GET_TERMINATION, ch, _ST_U32.size)
 
-        return bool(struct.unpack('<I', data)[0])
+        return bool(_ST_U32.unpack(data)[0])
 
     def get_state(self, ch: int) -> GsUSBDeviceState:
         """Send a get_state request."""
-        rtype = usb.util.build_request_type(usb.util.CTRL_IN,
-                                            usb.util.CTRL_TYPE_VENDOR,
-                                            usb.util.CTRL_RECIPIENT_INTERFACE)
-        data = self.device.ctrl_transfer(bmRequestType = rtype,
-                                         bRequest = GsUSBbRequest.GET_STATE,
-                                         wValue = ch, data_or_wLength = struct.calcsize('<3I'))
-
-        return GsUSBDeviceState(*struct.unpack('<3I', data))
+        data = self._ctrl_in(GsUSBbRequest.GET_STATE, ch, _ST_3U32.size)
+
+        return GsUSBDeviceState._make(_ST_3U32.unpack(data))
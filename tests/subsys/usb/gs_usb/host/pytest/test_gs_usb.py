@@ -7,8 +7,12 @@ Test suites for testing gs_usb
 """
 
 import logging
+import re
+import time
 import pytest
 
+from twister_harness import DeviceAdapter
+from twister_harness.exceptions import TwisterHarnessTimeoutException
 from gs_usb import  GsUSBCANChannelFeature, GsUSBCANChannelFlag, GsUSBCANChannelMode, \
     GsUSBCANChannelState, GsUSBDeviceBittiming, GsUSBDeviceMode
 
@@ -23,6 +27,34 @@ FAKE_CHANNELS = [ 0, 1 ]
 LOOPBACK_CHANNELS = [ 2, 3 ]
 NUM_CHANNELS = len(FAKE_CHANNELS + LOOPBACK_CHANNELS)
 
+START_MODE = GsUSBDeviceMode(GsUSBCANChannelMode.START, GsUSBCANChannelFlag.NORMAL)
+RESET_MODE = GsUSBDeviceMode(GsUSBCANChannelMode.RESET, GsUSBCANChannelFlag.NORMAL)
+
+def readlines_match_all(dut: DeviceAdapter, sequences: list[list[re.Pattern]],
+                        timeout: float) -> None:
+    """
+    Read lines from the DUT until all sequences of patterns have been matched. Patterns within a
+    sequence must match in order, while the sequences themselves may be interleaved.
+    """
+    pending = [list(seq) for seq in sequences]
+    deadline = time.monotonic() + timeout
+
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            pytest.fail(f'DUT output not matched: {[[p.pattern for p in seq] for seq in pending]}')
+
+        try:
+            line = dut.readline(timeout=remaining)
+        except TwisterHarnessTimeoutException:
+            pytest.fail(f'DUT output not matched: {[[p.pattern for p in seq] for seq in pending]}')
+
+        for seq in pending:
+            if seq[0].search(line):
+                seq.pop(0)
+
+        pending = [seq for seq in pending if seq]
+
 @pytest.mark.usefixtures('dut', 'dev')
 class TestGsUsbRequests():
     """
@@ -41,27 +73,26 @@ class TestGsUsbRequests():
 
     def test_mode(self, dut, dev) -> None:
         """Test the mode request"""
+        start_patterns = []
+        stop_patterns = []
         for ch in FAKE_CHANNELS:
-            mode = GsUSBDeviceMode(GsUSBCANChannelMode.START, GsUSBCANChannelFlag.NORMAL)
-            dev.mode(ch, mode)
+            start_patterns.append([
+                re.compile(fr'fake_can{ch}: mode = 0'),
+                re.compile(fr'fake_can{ch}: start'),
+                re.compile(fr'dev = {DEV_NAME}, ch = {ch}, started = 1, user_data = {USER_DATA}'),
+            ])
+            stop_patterns.append([
+                re.compile(fr'fake_can{ch}: stop'),
+                re.compile(fr'dev = {DEV_NAME}, ch = {ch}, started = 0, user_data = {USER_DATA}'),
+            ])
 
-            regex = fr'fake_can{ch}: mode = 0'
-            dut.readlines_until(regex=regex, timeout=TIMEOUT)
-
-            regex = fr'fake_can{ch}: start'
-            dut.readlines_until(regex=regex, timeout=TIMEOUT)
-
-            regex = fr'dev = {DEV_NAME}, ch = {ch}, started = 1, user_data = {USER_DATA}'
-            dut.readlines_until(regex=regex, timeout=TIMEOUT)
-
-            mode = GsUSBDeviceMode(GsUSBCANChannelMode.RESET, GsUSBCANChannelFlag.NORMAL)
-            dev.mode(ch, mode)
-
-            regex = fr'fake_can{ch}: stop'
-            dut.readlines_until(regex=regex, timeout=TIMEOUT)
+        for ch in FAKE_CHANNELS:
+            dev.mode(ch, START_MODE)
+        readlines_match_all(dut, start_patterns, TIMEOUT)
 
-            regex = fr'dev = {DEV_NAME}, ch = {ch}, started = 0, user_data = {USER_DATA}'
-            dut.readlines_until(regex=regex, timeout=TIMEOUT)
+        for ch in FAKE_CHANNELS:
+            dev.mode(ch, RESET_MODE)
+        readlines_match_all(dut, stop_patterns, TIMEOUT)
 
     def test_bt_const(self, dev) -> None:
         """Test the bt_const request"""
@@ -108,11 +139,11 @@ class TestGsUsbRequests():
     def test_identify(self, dut, dev) -> None:
         """Test the identify request"""
         for ident in (False, True):
+            patterns = [[re.compile(fr'dev = {DEV_NAME}, ch = {ch}, identify = {int(ident)}, '
+                                    fr'user_data = {USER_DATA}')] for ch in range(NUM_CHANNELS)]
             for ch in range(NUM_CHANNELS):
                 dev.identify(ch, ident)
-                regex = fr'dev = {DEV_NAME}, ch = {ch}, identify = {int(ident)}, ' \
-                        fr'user_data = {USER_DATA}'
-                dut.readlines_until(regex=regex, timeout=TIMEOUT)
+            readlines_match_all(dut, patterns, TIMEOUT)
 
     def test_data_bittiming(self, dut, dev) -> None:
         """Test the data_bittiming request"""
@@ -165,18 +196,18 @@ class TestGsUsbRequests():
     def test_set_termination(self, dut, dev) -> None:
         """Test the set_termination request"""
         for term in (False, True):
+            patterns = [[re.compile(fr'dev = {DEV_NAME}, ch = {ch}, terminate = {int(term)}, '
+                                    fr'user_data = {USER_DATA}')] for ch in range(NUM_CHANNELS)]
             for ch in range(NUM_CHANNELS):
                 dev.set_termination(ch, term)
-                regex = fr'dev = {DEV_NAME}, ch = {ch}, terminate = {int(term)}, ' \
-                        fr'user_data = {USER_DATA}'
-                dut.readlines_until(regex=regex, timeout=TIMEOUT)
+            readlines_match_all(dut, patterns, TIMEOUT)
 
     def test_get_termination(self, dut, dev) -> None:
         """Test the get_termination request"""
-        for ch in range(NUM_CHANNELS):
-            term = int(dev.get_termination(ch))
-            regex = fr'dev = {DEV_NAME}, ch = {ch}, terminated = {term}, user_data = {USER_DATA}'
-            dut.readlines_until(regex=regex, timeout=TIMEOUT)
+        terms = [int(dev.get_termination(ch)) for ch in range(NUM_CHANNELS)]
+        patterns = [[re.compile(fr'dev = {DEV_NAME}, ch = {ch}, terminated = {term}, '
+                                fr'user_data = {USER_DATA}')] for ch, term in enumerate(terms)]
+        readlines_match_all(dut, patterns, TIMEOUT)
 
     def test_get_state(self, dev) -> None:
         """Test the get_state request"""